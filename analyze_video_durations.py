@@ -1,12 +1,18 @@
+import io
 import os
+import re
+import argparse
 import boto3
-import json
+import ijson
+import orjson
 import time
-import statistics
+import numpy as np
 import pandas as pd
 from botocore.config import Config
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
+from urllib.parse import unquote_plus
 
 from dotenv import load_dotenv
 
@@ -20,75 +26,165 @@ ACCESS_KEY = os.getenv("NCP_IAM_ACCESS_KEY")
 SECRET_KEY = os.getenv("NCP_IAM_SECRET_KEY")
 BUCKET_NAME = "rapa-maiu-sfacspace"
 
-# boto3 클라이언트 생성
-s3 = boto3.client(
-    SERVICE_NAME,
-    endpoint_url=ENDPOINT_URL,
-    region_name=REGION_NAME,
+# S3 Inventory 보고서 (설정된 경우 목록 조회 대신 사용, 예: inventory/<bucket>/<config>/<date>/manifest.json)
+INVENTORY_BUCKET = os.getenv("NCP_INVENTORY_BUCKET", BUCKET_NAME)
+INVENTORY_MANIFEST_KEY = os.getenv("NCP_INVENTORY_MANIFEST_KEY")
+
+# S3 이벤트 알림 큐 (설정된 경우 주기적 폴더 확인 대신 사용)
+EVENT_QUEUE_URL = os.getenv("NCP_EVENT_QUEUE_URL")
+EVENT_QUEUE_ENDPOINT = os.getenv("NCP_EVENT_QUEUE_ENDPOINT")
+
+# boto3 세션/클라이언트 생성 (클라이언트 하나를 모든 스레드에서 공유)
+session = boto3.session.Session(
     aws_access_key_id=ACCESS_KEY,
     aws_secret_access_key=SECRET_KEY,
-    config=Config(s3={"addressing_style": "path"}),
+    region_name=REGION_NAME,
 )
 
+s3 = session.client(
+    SERVICE_NAME,
+    endpoint_url=ENDPOINT_URL,
+    config=Config(
+        s3={"addressing_style": "path"},
+        max_pool_connections=64,  # 동시 다운로드 스레드가 연결 풀에서 기다리지 않도록
+        retries={"max_attempts": 10, "mode": "adaptive"},
+        tcp_keepalive=True,
+    ),
+)
+
+# 이벤트 큐 클라이언트 (큐가 설정된 경우에만 생성)
+sqs = session.client(
+    "sqs",
+    endpoint_url=EVENT_QUEUE_ENDPOINT,
+) if EVENT_QUEUE_URL else None
+
 # 설정
 PROCESSED_FOLDERS_FILE = "processed_folders.json"
+ETAG_CACHE_FILE = "etag_cache.json"  # 파일 내용(ETag)별 영상 길이 캐시
 OUTPUT_DIR = "stats_output"
+STATS_ALL_FILE = os.path.join(OUTPUT_DIR, "video_stats_ALL.csv")  # 모든 폴더의 통계를 모은 CSV
+UPLOADS_PREFIX = "raw/uploads/"
 CHECK_INTERVAL = 300  # 5분마다 체크 (초 단위)
+STATS_CACHE_TTL = 24 * 60 * 60  # 저장된 통계가 이 시간(초)보다 최근이면 폴더를 다시 처리하지 않음
+MAX_WORKERS = 48  # JSON 파일 동시 다운로드 스레드 수 (max_pool_connections 이하)
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024  # 이보다 큰 파일은 구간(Range)별로 나눠서 다운로드
+MULTIPART_WORKERS = 8  # 큰 파일 하나를 받을 때 사용할 스레드 수
+MANIFEST_HEAD_BYTES = 4096  # 이보다 큰 JSON은 앞부분만 먼저 받아 duration을 찾음
+EVENT_WAIT_TIME = 20  # 이벤트 큐 long polling 대기 시간 (초 단위, 최대 20)
+EVENT_SETTLE_TIME = 60  # 폴더의 마지막 알림 후 이 시간(초)이 지나면 업로드 완료로 보고 처리
+# duration 형식 (기존 strptime("%H:%M:%S")과 같은 범위: 시 0-23, 분/초 0-59)
+INVENTORY_MAX_AGE = 24 * 60 * 60  # 이보다 오래된 Inventory 보고서는 사용하지 않음 (초 단위)
+INVENTORY_SETTLE_TIME = 60 * 60  # 보고서 생성 전 이 시간(초) 안에 파일이 바뀐 폴더는 업로드 중일 수 있어 목록 조회 사용
+FIXED_DURATION_RE = re.compile(r"(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]")  # 빠른 변환이 가능한 고정 길이 HH:MM:SS
+DURATION_RE = re.compile(r"^(2[0-3]|[01]?[0-9]):([0-5]?[0-9]):([0-5]?[0-9])\Z")  # 한 자리 시/분/초도 허용
 
 class VideoStatsProcessor:
-    def __init__(self):
+    def __init__(self, force=False):
+        self.force = force
         self.processed_folders = self.load_processed_folders()
+        self.etag_cache = self.load_etag_cache()
+        self.saved_stats = self.load_saved_stats()
+        self.inventory = None
+        self.pending_event_folders = {}  # 이벤트로 알게 된 폴더 -> 마지막 알림 시각
         Path(OUTPUT_DIR).mkdir(exist_ok=True)
     
     def load_processed_folders(self):
         """처리된 폴더 목록을 로드"""
         if os.path.exists(PROCESSED_FOLDERS_FILE):
-            with open(PROCESSED_FOLDERS_FILE, 'r') as f:
-                return set(json.load(f))
+            with open(PROCESSED_FOLDERS_FILE, 'rb') as f:
+                return set(orjson.loads(f.read()))
         return set()
     
     def save_processed_folders(self):
         """처리된 폴더 목록을 저장"""
-        with open(PROCESSED_FOLDERS_FILE, 'w') as f:
-            json.dump(list(self.processed_folders), f, indent=2)
+        with open(PROCESSED_FOLDERS_FILE, 'wb') as f:
+            f.write(orjson.dumps(list(self.processed_folders), option=orjson.OPT_INDENT_2))
+    
+    def load_etag_cache(self):
+        """ETag별 영상 길이 캐시를 로드 (etag -> duration_sec)"""
+        if os.path.exists(ETAG_CACHE_FILE):
+            with open(ETAG_CACHE_FILE, 'rb') as f:
+                return orjson.loads(f.read())
+        return {}
+    
+    def save_etag_cache(self):
+        """ETag별 영상 길이 캐시를 저장"""
+        with open(ETAG_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps(self.etag_cache))
+    
+    def load_saved_stats(self):
+        """저장된 폴더별 통계를 로드 (폴더명 -> 통계 행)"""
+        if os.path.exists(STATS_ALL_FILE):
+            stats_df = pd.read_csv(STATS_ALL_FILE, encoding='utf-8-sig', dtype={'폴더명': str})
+            return {row['폴더명']: row for row in stats_df.to_dict('records')}
+        return {}
+    
+    def save_stats(self, rows):
+        """처리한 폴더들의 통계를 기존 통계와 합쳐 CSV 하나로 저장"""
+        if not rows:
+            return
+        
+        for row in rows:
+            self.saved_stats[row['폴더명']] = row
+        
+        pd.DataFrame(list(self.saved_stats.values())).to_csv(STATS_ALL_FILE, index=False, encoding='utf-8-sig')
+        print(f"\n통계 CSV 저장 완료: {STATS_ALL_FILE} ({len(rows)}개 폴더 갱신)")
     
     def get_all_upload_folders(self):
         """'raw/uploads/' 내의 모든 폴더 목록을 가져오기"""
-        prefix_base = 'raw/uploads/'
         folders = []
         
-        continuation_token = None
-        while True:
-            params = {
-                'Bucket': BUCKET_NAME,
-                'Prefix': prefix_base,
-                'Delimiter': '/'
-            }
-            if continuation_token:
-                params['ContinuationToken'] = continuation_token
-            
-            response = s3.list_objects_v2(**params)
-            
-            if 'CommonPrefixes' in response:
-                batch_folders = [content['Prefix'] for content in response['CommonPrefixes']]
-                folders.extend(batch_folders)
-            
-            if response.get('IsTruncated', False):
-                continuation_token = response.get('NextContinuationToken')
-            else:
-                break
+        paginator = s3.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=BUCKET_NAME,
+            Prefix=UPLOADS_PREFIX,
+            Delimiter='/',
+            PaginationConfig={'PageSize': 1000}
+        )
+        for page in pages:
+            folders.extend(content['Prefix'] for content in page.get('CommonPrefixes', []))
         
         return folders
     
-    def parse_duration(self, duration_str):
-        """duration 문자열 -> 초 변환 함수"""
-        try:
-            t = datetime.strptime(duration_str, "%H:%M:%S")
-            delta = timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
-            return int(delta.total_seconds())
-        except Exception as e:
-            print(f"Invalid duration format: {duration_str} - {e}")
-            return 0
+    def parse_durations(self, duration_strs):
+        """duration 문자열 목록 -> 초 배열 변환 함수 (잘못된 형식은 0)"""
+        raw = pd.Series(duration_strs, dtype=object)
+        seconds = np.zeros(len(raw), dtype=np.int64)
+        is_str = raw.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        
+        # 대부분의 값은 고정 길이 HH:MM:SS이므로 문자 코드에서 바로 계산
+        fixed = np.fromiter(
+            (is_str[i] and FIXED_DURATION_RE.fullmatch(value) is not None for i, value in enumerate(duration_strs)),
+            dtype=bool,
+            count=len(raw)
+        )
+        if fixed.any():
+            chars = np.frombuffer(''.join(raw[fixed]).encode('ascii'), dtype=np.uint8)
+            digits = chars.reshape(-1, 8).astype(np.int64) - ord('0')
+            seconds[fixed] = (
+                (digits[:, 0] * 10 + digits[:, 1]) * 3600
+                + (digits[:, 3] * 10 + digits[:, 4]) * 60
+                + digits[:, 6] * 10 + digits[:, 7]
+            )
+        
+        # 그 외 값(예: 1:02:03)은 시/분/초를 한 번에 추출해서 변환
+        rest = ~fixed
+        if rest.any():
+            rest_raw = raw[rest]
+            # 문자열이 아닌 값(숫자, bool 등)은 빈 문자열로 바꿔 잘못된 형식으로 처리
+            parts = rest_raw.where(is_str[rest], '').str.extract(DURATION_RE)
+            valid = parts.notna().all(axis=1).to_numpy()
+            
+            invalid = ~valid & rest_raw.notna().to_numpy() & (rest_raw != '').to_numpy()
+            if invalid.any():
+                print(f"Invalid duration format: {invalid.sum()}개 (예: {rest_raw[invalid].iloc[0]})")
+            
+            hms = parts[valid].astype(np.int64).to_numpy()
+            rest_seconds = np.zeros(len(rest_raw), dtype=np.int64)
+            rest_seconds[valid] = hms[:, 0] * 3600 + hms[:, 1] * 60 + hms[:, 2]
+            seconds[rest] = rest_seconds
+        
+        return seconds
     
     def seconds_to_hms(self, seconds):
         """초를 시:분:초 형태로 변환하는 함수"""
@@ -96,127 +192,259 @@ class VideoStatsProcessor:
         minutes, secs = divmod(remainder, 60)
         return f"{hours}:{minutes:02d}:{secs:02d}"
     
-    def get_json_files_from_folder(self, folder_prefix):
-        """특정 폴더에서 모든 JSON 파일 목록을 가져오기 (페이지네이션 처리)"""
-        manifests_prefix = f"{folder_prefix}manifests/"
-        json_files = []
-        
-        continuation_token = None
-        total_objects = 0
+    def load_inventory(self):
+        """S3 Inventory 보고서에서 폴더별 JSON 파일 목록을 로드 (설정이 없거나 읽을 수 없으면 None)"""
+        if not INVENTORY_MANIFEST_KEY:
+            return None
         
-        while True:
-            params = {
-                'Bucket': BUCKET_NAME,
-                'Prefix': manifests_prefix
-            }
-            if continuation_token:
-                params['ContinuationToken'] = continuation_token
+        try:
+            obj = s3.get_object(Bucket=INVENTORY_BUCKET, Key=INVENTORY_MANIFEST_KEY)
+            manifest = orjson.loads(obj['Body'].read())
+            if manifest.get('fileFormat', '').lower() != 'parquet':
+                print(f"지원하지 않는 Inventory 형식입니다: {manifest.get('fileFormat')}")
+                return None
             
-            response = s3.list_objects_v2(**params)
+            # 보고서 이후 올라온 파일은 빠져 있으므로 오래된 보고서는 사용하지 않음
+            # (creationTimestamp: 보고서 생성 시각, epoch 밀리초)
+            report_time = int(manifest['creationTimestamp']) / 1000
+            report_age = time.time() - report_time
+            if report_age > INVENTORY_MAX_AGE:
+                print(f"Inventory 보고서가 오래되어 목록 조회를 사용합니다 (생성 후 {int(report_age)}초 경과)")
+                return None
             
-            if 'Contents' in response:
-                batch_files = [item['Key'] for item in response['Contents'] if item['Key'].endswith('.json')]
-                json_files.extend(batch_files)
-                total_objects += len(response['Contents'])
+            # 보고서 파일은 destinationBucket(arn:aws:s3:::<bucket>)에 저장됨
+            report_bucket = manifest.get('destinationBucket', INVENTORY_BUCKET).split(':::')[-1]
+            frames = []
+            for report_file in manifest.get('files', []):
+                body = s3.get_object(Bucket=report_bucket, Key=report_file['key'])['Body'].read()
+                frames.append(pd.read_parquet(io.BytesIO(body), columns=['key', 'size', 'e_tag', 'last_modified_date']))
             
-            if response.get('IsTruncated', False):
-                continuation_token = response.get('NextContinuationToken')
-            else:
-                break
+            if not frames:
+                return None
+            
+            inventory_df = pd.concat(frames, ignore_index=True)
+            modified_times = (
+                pd.to_datetime(inventory_df['last_modified_date'], utc=True) - pd.Timestamp(0, tz='UTC')
+            ).dt.total_seconds().to_numpy()
+            
+            # 폴더마다 전체 목록을 다시 훑지 않도록 '<폴더>/manifests/' 기준으로 한 번만 묶어 둠
+            # (folder_prefix -> [(key, etag, size), ...])
+            inventory = {}
+            newest_modified = {}  # folder_prefix -> 가장 최근 파일 수정 시각
+            for key, etag, size, modified in zip(inventory_df['key'], inventory_df['e_tag'], inventory_df['size'], modified_times):
+                if not key.startswith(UPLOADS_PREFIX) or not key.endswith('.json'):
+                    continue
+                folder, sep, rest = key[len(UPLOADS_PREFIX):].partition('/')
+                if folder and sep and rest.startswith('manifests/'):
+                    folder_prefix = f"{UPLOADS_PREFIX}{folder}/"
+                    inventory.setdefault(folder_prefix, []).append((key, etag.strip('"'), size))
+                    newest_modified[folder_prefix] = max(newest_modified.get(folder_prefix, modified), modified)
+            
+            # 보고서 직전까지 파일이 올라오던 폴더는 보고서 이후에도 파일이 더 생겼을 수 있으므로 제외
+            for folder_prefix, modified in newest_modified.items():
+                if report_time - modified < INVENTORY_SETTLE_TIME:
+                    del inventory[folder_prefix]
+            
+            print(f"Inventory 로드 완료: 폴더 {len(inventory)}개, JSON 파일 {sum(map(len, inventory.values()))}개")
+            return inventory
+        
+        except Exception as e:
+            print(f"Inventory를 읽을 수 없어 목록 조회를 사용합니다: {e}")
+            return None
+    
+    def get_json_files_from_folder(self, folder_prefix):
+        """특정 폴더에서 모든 JSON 파일 목록을 (key, etag, size)로 가져오기 (페이지네이션 처리)"""
+        manifests_prefix = f"{folder_prefix}manifests/"
+        
+        # Inventory에 있는 폴더는 목록 조회 없이 바로 사용 (보고서 이후 생긴 폴더는 목록 조회)
+        if self.inventory is not None:
+            json_files = self.inventory.get(folder_prefix)
+            if json_files:
+                return json_files
+        
+        json_files = []
+        
+        paginator = s3.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=BUCKET_NAME,
+            Prefix=manifests_prefix,
+            PaginationConfig={'PageSize': 1000}
+        )
+        for page in pages:
+            json_files.extend(
+                (item['Key'], item['ETag'].strip('"'), item['Size'])
+                for item in page.get('Contents', []) if item['Key'].endswith('.json')
+            )
         
         return json_files
     
+    def _multipart_get(self, key, size):
+        """파일 내용을 읽기 (큰 파일은 구간별 병렬 다운로드 후 합치기)"""
+        # 크기는 목록 조회 결과를 사용하므로 작은 파일은 요청 한 번으로 끝남
+        if size <= MULTIPART_CHUNK_SIZE:
+            return s3.get_object(Bucket=BUCKET_NAME, Key=key)['Body'].read()
+        
+        ranges = [
+            (start, min(start + MULTIPART_CHUNK_SIZE, size) - 1)
+            for start in range(0, size, MULTIPART_CHUNK_SIZE)
+        ]
+        
+        def get_range(byte_range):
+            start, end = byte_range
+            obj = s3.get_object(Bucket=BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}")
+            return obj['Body'].read()
+        
+        with ThreadPoolExecutor(max_workers=MULTIPART_WORKERS) as executor:
+            parts = list(executor.map(get_range, ranges))
+        
+        return b''.join(parts)
+    
+    def _fetch_duration(self, key, size):
+        """JSON 파일 하나를 읽어 duration 문자열을 반환"""
+        # 큰 파일은 앞부분만 받아서 duration이 나올 때까지만 스트리밍 파싱
+        if size > MANIFEST_HEAD_BYTES:
+            obj = s3.get_object(Bucket=BUCKET_NAME, Key=key, Range=f"bytes=0-{MANIFEST_HEAD_BYTES - 1}")
+            try:
+                return next(ijson.items(io.BytesIO(obj['Body'].read()), 'duration'))
+            except (StopIteration, ijson.JSONError):
+                pass  # 앞부분에 duration이 없으면 전체 파일을 읽음
+        
+        # orjson은 bytes를 바로 파싱하므로 별도의 decode가 필요 없음
+        data = orjson.loads(self._multipart_get(key, size))
+        return data.get('duration', None)
+    
     def process_folder(self, folder_prefix):
-        """특정 폴더의 영상 길이 통계를 처리"""
+        """특정 폴더의 영상 길이 통계를 계산해 통계 행을 반환 (실패 시 None)"""
         folder_name = folder_prefix.strip('/').split('/')[-1]
         print(f"\n{'='*60}")
         print(f"폴더 처리 시작: {folder_name}")
         print(f"{'='*60}")
         
+        # 최근에 계산한 통계가 있으면 S3 조회 없이 그대로 사용
+        saved_row = self.saved_stats.get(folder_name)
+        if not self.force and saved_row is not None:
+            processed_at = datetime.strptime(saved_row['처리시간'], '%Y-%m-%d %H:%M:%S')
+            age = time.time() - processed_at.timestamp()
+            if age < STATS_CACHE_TTL:
+                print(f"기존 통계 사용 (처리 후 {int(age)}초 경과): {STATS_ALL_FILE}")
+                return saved_row
+        
         # JSON 파일 목록 가져오기
         json_files = self.get_json_files_from_folder(folder_prefix)
         print(f"JSON 파일 발견: {len(json_files)}개")
         
         if not json_files:
             print(f"폴더 {folder_name}에서 JSON 파일을 찾을 수 없습니다.")
-            return False
+            return None
         
-        # 각 영상의 길이를 저장할 리스트
-        durations_seconds = []
-        print(f"JSON 파일 읽는 중... (총 {len(json_files)}개 파일)")
+        # 같은 내용(ETag)의 파일은 캐시에서 재사용 (같은 key로 다시 올라온 파일은 ETag가 바뀌어 새로 읽음)
+        cached_count = sum(1 for _, etag, _ in json_files if etag in self.etag_cache)
+        if cached_count:
+            print(f"캐시에서 재사용: {cached_count}개 파일")
         
-        for i, key in enumerate(json_files, 1):
-            try:
-                obj = s3.get_object(Bucket=BUCKET_NAME, Key=key)
-                content = obj['Body'].read().decode('utf-8')
-                data = json.loads(content)
-                
-                duration_str = data.get('duration', None)
-                if duration_str:
-                    duration_seconds = self.parse_duration(duration_str)
-                    if duration_seconds > 0:
-                        durations_seconds.append(duration_seconds)
+        pending_files = {}  # etag -> (key, size), 같은 내용의 파일은 한 번만 다운로드
+        for key, etag, size in json_files:
+            if etag not in self.etag_cache:
+                pending_files.setdefault(etag, (key, size))
+        
+        if pending_files:
+            print(f"JSON 파일 읽는 중... (총 {len(pending_files)}개 파일)")
+            
+            # S3 요청은 네트워크 대기 시간이 대부분이므로 스레드로 병렬 처리
+            # 결과는 메인 스레드에서만 소비하므로 진행 카운터에 락이 필요 없음
+            done = 0
+            raw_durations = {}
+            
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = {
+                    executor.submit(self._fetch_duration, key, size): (etag, key)
+                    for etag, (key, size) in pending_files.items()
+                }
                 
-                # 진행상황 표시
-                if i % 100 == 0 or i == len(json_files):
-                    print(f"진행중... {i}/{len(json_files)} 파일 처리 완료")
+                for future in as_completed(futures):
+                    etag, key = futures[future]
+                    try:
+                        raw_durations[etag] = future.result()
+                    except Exception as e:
+                        print(f"파일 처리 중 오류 발생 ({key}): {e}")
                     
-            except Exception as e:
-                print(f"파일 처리 중 오류 발생 ({key}): {e}")
+                    # 진행상황 표시
+                    done += 1
+                    if done % 100 == 0 or done == len(pending_files):
+                        print(f"진행중... {done}/{len(pending_files)} 파일 처리 완료")
+            
+            # 길이 문자열은 파일마다 변환하지 않고 한 번에 변환
+            if raw_durations:
+                parsed = self.parse_durations(list(raw_durations.values()))
+                self.etag_cache.update((etag, int(duration)) for etag, duration in zip(raw_durations.keys(), parsed))
+                self.save_etag_cache()
+        
+        # 각 영상의 길이 (목록 순서 유지, 길이 정보가 없는 파일 제외)
+        # Python 리스트를 거치지 않고 int32 배열에 바로 채움
+        durations_seconds = np.fromiter(
+            (self.etag_cache.get(etag, 0) for _, etag, _ in json_files),
+            dtype=np.int32,
+            count=len(json_files)
+        )
+        durations_seconds = durations_seconds[durations_seconds > 0]
         
-        if not durations_seconds:
+        if not durations_seconds.size:
             print(f"폴더 {folder_name}에서 유효한 영상 길이 데이터를 찾을 수 없습니다.")
-            return False
+            return None
         
         # 통계 계산
-        total_videos = len(durations_seconds)
-        total_duration_seconds = sum(durations_seconds)
+        total_videos = int(durations_seconds.size)
+        total_duration_seconds = int(durations_seconds.sum(dtype=np.int64))
         average_duration_seconds = total_duration_seconds / total_videos
-        min_duration_seconds = min(durations_seconds)
-        max_duration_seconds = max(durations_seconds)
-        median_duration_seconds = statistics.median(durations_seconds)
+        min_duration_seconds = int(durations_seconds.min())
+        max_duration_seconds = int(durations_seconds.max())
+        # statistics.median과 같은 형식: 개수가 홀수면 가운데 값(int), 짝수면 두 값의 평균(float)
+        median_duration_seconds = np.median(durations_seconds)
+        median_duration_seconds = int(median_duration_seconds) if total_videos % 2 else float(median_duration_seconds)
         
-        # 길이별 분포 계산
-        ranges = [(0, 1800), (1800, 2400), (2400, 3000), (3000, 3600), (3600, float('inf'))]
+        # 길이별 분포 계산 (구간 경계: 30분, 40분, 50분, 1시간)
+        range_edges = np.array([1800, 2400, 3000, 3600], dtype=np.int32)
         range_labels = ["30분 미만", "30-39분", "40-49분", "50-59분", "1시간 이상"]
         
+        # 각 영상의 구간 번호를 한 번에 찾고 구간별 개수를 세기
+        counts = np.bincount(
+            np.searchsorted(range_edges, durations_seconds, side='right'),
+            minlength=len(range_labels)
+        )
+        # 비율은 구간 5개뿐이므로 기존과 같은 값이 나오도록 Python round로 계산
+        percentages = [round((int(count) / total_videos) * 100, 1) for count in counts]
+        
         distribution = {}
-        for (min_sec, max_sec), label in zip(ranges, range_labels):
-            count = len([d for d in durations_seconds if min_sec <= d < max_sec])
-            percentage = (count / total_videos) * 100
-            distribution[f"{label}_개수"] = count
-            distribution[f"{label}_비율"] = round(percentage, 1)
+        for label, count, percentage in zip(range_labels, counts, percentages):
+            distribution[f"{label}_개수"] = int(count)
+            distribution[f"{label}_비율"] = percentage
         
-        # 통계 데이터를 CSV로 저장
+        # 통계 데이터 (CSV 저장은 폴더들을 모아서 한 번에)
         stats_data = {
-            "폴더명": [folder_name],
-            "처리시간": [datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-            "총_영상_개수": [total_videos],
-            "총_영상_시간_초": [total_duration_seconds],
-            "총_영상_시간_HMS": [self.seconds_to_hms(total_duration_seconds)],
-            "평균_길이_초": [round(average_duration_seconds, 2)],
-            "평균_길이_HMS": [self.seconds_to_hms(average_duration_seconds)],
-            "최소_길이_초": [min_duration_seconds],
-            "최소_길이_HMS": [self.seconds_to_hms(min_duration_seconds)],
-            "최대_길이_초": [max_duration_seconds],
-            "최대_길이_HMS": [self.seconds_to_hms(max_duration_seconds)],
-            "중간값_초": [median_duration_seconds],
-            "중간값_HMS": [self.seconds_to_hms(median_duration_seconds)]
+            "폴더명": folder_name,
+            "처리시간": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "총_영상_개수": total_videos,
+            "총_영상_시간_초": total_duration_seconds,
+            "총_영상_시간_HMS": self.seconds_to_hms(total_duration_seconds),
+            "평균_길이_초": round(average_duration_seconds, 2),
+            "평균_길이_HMS": self.seconds_to_hms(average_duration_seconds),
+            "최소_길이_초": min_duration_seconds,
+            "최소_길이_HMS": self.seconds_to_hms(min_duration_seconds),
+            "최대_길이_초": max_duration_seconds,
+            "최대_길이_HMS": self.seconds_to_hms(max_duration_seconds),
+            "중간값_초": median_duration_seconds,
+            "중간값_HMS": self.seconds_to_hms(median_duration_seconds)
         }
         
         # 분포 데이터 추가
-        for key, value in distribution.items():
-            stats_data[key] = [value]
+        stats_data.update(distribution)
         
-        # DataFrame 생성 및 CSV 저장
-        stats_df = pd.DataFrame(stats_data)
-        csv_path = os.path.join(OUTPUT_DIR, f"video_stats_{folder_name}.csv")
-        stats_df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-        
-        # 개별 영상 길이 데이터도 별도 CSV로 저장 (필요시)
+        # 개별 영상 길이 데이터도 별도 parquet로 저장 (필요시)
         durations_df = pd.DataFrame(durations_seconds, columns=["duration_sec"])
-        durations_csv_path = os.path.join(OUTPUT_DIR, f"video_durations_raw_{folder_name}.csv")
-        durations_df.to_csv(durations_csv_path, index=False)
+        durations_parquet_path = os.path.join(OUTPUT_DIR, f"video_durations_raw_{folder_name}.parquet")
+        durations_df.astype({'duration_sec': 'int32'}).to_parquet(
+            durations_parquet_path, engine='pyarrow', compression='zstd', index=False
+        )
         
         # 결과 출력
         print(f"\n영상 길이 통계 분석 결과 - {folder_name}")
@@ -231,59 +459,150 @@ class VideoStatsProcessor:
         
         # 길이별 분포 출력
         print(f"\n길이 분포:")
-        for (min_sec, max_sec), label in zip(ranges, range_labels):
-            count = len([d for d in durations_seconds if min_sec <= d < max_sec])
-            percentage = (count / total_videos) * 100
+        for label, count, percentage in zip(range_labels, counts, percentages):
             print(f"{label}: {count}개 ({percentage:.1f}%)")
         
-        print(f"\n결과 저장 완료:")
-        print(f"- 통계 CSV: {csv_path}")
-        print(f"- 원본 데이터 CSV: {durations_csv_path}")
+        print(f"\n원본 데이터 Parquet 저장 완료: {durations_parquet_path}")
         
-        return True
+        return stats_data
     
     def run_initial_processing(self):
         """초기 실행 시 모든 폴더를 처리"""
         print("초기 실행: 모든 폴더 처리를 시작합니다...")
         
+        self.inventory = self.load_inventory()
         all_folders = self.get_all_upload_folders()
         print(f"총 {len(all_folders)}개의 폴더를 발견했습니다.")
         
+        rows = []
         for i, folder in enumerate(all_folders, 1):
             folder_name = folder.strip('/').split('/')[-1]
             print(f"\n[{i}/{len(all_folders)}] 폴더 처리: {folder_name}")
             
-            if self.process_folder(folder):
+            stats_row = self.process_folder(folder)
+            if stats_row is not None:
+                rows.append(stats_row)
                 self.processed_folders.add(folder)
         
+        # 모니터링 중 새로 생기는 폴더는 주기적으로 만들어지는 보고서에 거의 없으므로 목록 조회를 사용
+        self.inventory = None
+        
+        self.save_stats(rows)
         self.save_processed_folders()
         print(f"\n초기 처리 완료! {len(self.processed_folders)}개 폴더 처리됨")
     
+    def process_new_folders(self, new_folders):
+        """새 폴더들을 처리하고 처리된 폴더 목록을 저장"""
+        print(f"\n새로운 폴더 {len(new_folders)}개 발견!")
+        rows = []
+        for folder in sorted(new_folders):
+            folder_name = folder.strip('/').split('/')[-1]
+            print(f"새 폴더 처리: {folder_name}")
+            
+            stats_row = self.process_folder(folder)
+            if stats_row is not None:
+                rows.append(stats_row)
+                self.processed_folders.add(folder)
+        
+        self.save_stats(rows)
+        self.save_processed_folders()
+        print(f"새 폴더 처리 완료!")
+    
     def check_new_folders(self):
         """새로운 폴더가 있는지 확인하고 처리"""
         current_folders = set(self.get_all_upload_folders())
         new_folders = current_folders - self.processed_folders
         
         if new_folders:
-            print(f"\n새로운 폴더 {len(new_folders)}개 발견!")
-            for folder in sorted(new_folders):
-                folder_name = folder.strip('/').split('/')[-1]
-                print(f"새 폴더 처리: {folder_name}")
-                
-                if self.process_folder(folder):
-                    self.processed_folders.add(folder)
-            
-            self.save_processed_folders()
-            print(f"새 폴더 처리 완료!")
+            self.process_new_folders(new_folders)
         else:
             print("새로운 폴더가 없습니다.")
     
+    def get_folders_from_event(self, body):
+        """S3 이벤트 메시지에서 새 파일이 생긴 업로드 폴더 prefix를 추출 (읽을 수 없는 메시지는 빈 set)"""
+        folders = set()
+        try:
+            event = orjson.loads(body)
+            # SNS 등을 거친 경우 원래 이벤트가 Message 필드에 문자열로 들어 있음
+            if isinstance(event, dict) and 'Message' in event:
+                event = orjson.loads(event['Message'])
+            if not isinstance(event, dict):
+                raise ValueError(f"이벤트 형식이 아닙니다: {type(event).__name__}")
+            
+            records = event.get('Records') or []
+            if not isinstance(records, list):
+                raise ValueError("Records가 목록이 아닙니다")
+            
+            for record in records:
+                if not isinstance(record, dict) or not str(record.get('eventName', '')).startswith('ObjectCreated'):
+                    continue
+                
+                key = ((record.get('s3') or {}).get('object') or {}).get('key')
+                if not isinstance(key, str):
+                    continue
+                
+                key = unquote_plus(key)
+                if not key.startswith(UPLOADS_PREFIX):
+                    continue
+                
+                folder, sep, _ = key[len(UPLOADS_PREFIX):].partition('/')
+                if folder and sep:
+                    folders.add(f"{UPLOADS_PREFIX}{folder}/")
+        except Exception as e:
+            print(f"이벤트 메시지를 읽을 수 없습니다: {e}")
+            return set()
+        
+        return folders
+    
+    def receive_folder_events(self):
+        """이벤트 큐에서 알림을 받아 새 폴더를 처리 (큐에 접근할 수 없으면 False)"""
+        try:
+            response = sqs.receive_message(
+                QueueUrl=EVENT_QUEUE_URL,
+                WaitTimeSeconds=EVENT_WAIT_TIME,
+                MaxNumberOfMessages=10
+            )
+        except Exception as e:
+            print(f"이벤트 큐에 접근할 수 없어 주기적 확인으로 대체합니다: {e}")
+            return False
+        
+        now = time.time()
+        for message in response.get('Messages', []):
+            try:
+                for folder in self.get_folders_from_event(message.get('Body', '')):
+                    if folder not in self.processed_folders:
+                        self.pending_event_folders[folder] = now
+            finally:
+                # 읽을 수 없는 메시지도 삭제해서 같은 메시지가 계속 다시 오지 않도록 함
+                sqs.delete_message(QueueUrl=EVENT_QUEUE_URL, ReceiptHandle=message['ReceiptHandle'])
+        
+        # 업로드 도중에 처리하지 않도록 마지막 알림 후 EVENT_SETTLE_TIME이 지난 폴더만 처리
+        ready_folders = {
+            folder for folder, last_event in self.pending_event_folders.items()
+            if now - last_event >= EVENT_SETTLE_TIME
+        }
+        if ready_folders:
+            for folder in ready_folders:
+                del self.pending_event_folders[folder]
+            self.process_new_folders(ready_folders)
+        
+        return True
+    
     def run_monitoring(self):
         """지속적으로 새 폴더를 모니터링"""
-        print(f"\n모니터링 시작... {CHECK_INTERVAL}초마다 새 폴더 확인")
+        if sqs is not None:
+            print(f"\n모니터링 시작... S3 이벤트 큐에서 새 폴더 알림 대기")
+            # 프로그램이 꺼져 있던 동안 생긴 폴더는 알림이 없으므로 한 번 확인
+            self.check_new_folders()
+        else:
+            print(f"\n모니터링 시작... {CHECK_INTERVAL}초마다 새 폴더 확인")
         
         while True:
             try:
+                # 이벤트 큐를 사용할 수 있으면 알림이 온 폴더만 처리
+                if sqs is not None and self.receive_folder_events():
+                    continue
+                
                 print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 새 폴더 확인 중...")
                 self.check_new_folders()
                 
@@ -299,10 +618,14 @@ class VideoStatsProcessor:
                 time.sleep(5)
 
 def main():
-    processor = VideoStatsProcessor()
+    parser = argparse.ArgumentParser(description="NCP Object Storage 업로드 영상 길이 통계")
+    parser.add_argument('--force', action='store_true', help="저장된 통계가 있어도 폴더를 다시 처리")
+    args = parser.parse_args()
+    
+    processor = VideoStatsProcessor(force=args.force)
     
-    # 처리된 폴더가 없으면 초기 실행
-    if not processor.processed_folders:
+    # 처리된 폴더가 없거나 --force이면 초기 실행
+    if args.force or not processor.processed_folders:
         processor.run_initial_processing()
     else:
         print(f"기존에 처리된 폴더: {len(processor.processed_folders)}개")
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import altair as alt
+import io
 import os
 import glob
 from pathlib import Path
@@ -11,6 +11,22 @@ st.set_page_config(page_title="Video Length Statistics Dashboard", layout="wide"
 
 st.title("📊 Video Length Statistics Dashboard")
 
+NUMERIC_COLS = [
+    '총_영상_개수', '총_영상_시간_초', '평균_길이_초', '최소_길이_초', '최대_길이_초', '중간값_초',
+    '30분 미만_개수', '30분 미만_비율',
+    '30-39분_개수', '30-39분_비율',
+    '40-49분_개수', '40-49분_비율',
+    '50-59분_개수', '50-59분_비율',
+    '1시간 이상_개수', '1시간 이상_비율'
+]
+
+def convert_numeric_columns(df):
+    """Convert the statistics columns that exist in the dataframe to numbers"""
+    existing_numeric_cols = [col for col in NUMERIC_COLS if col in df.columns]
+    if existing_numeric_cols:
+        df[existing_numeric_cols] = df[existing_numeric_cols].apply(pd.to_numeric, errors='coerce')
+    return df
+
 @st.cache_data
 def load_csv_files():
     """Load all CSV files from stats_output directory"""
@@ -48,14 +64,35 @@ def load_csv_files():
         if not dfs:
             return None, "No files could be loaded successfully"
             
-        # Combine all dataframes
-        full_df = pd.concat(dfs, ignore_index=True)
+        # Combine all dataframes and convert numeric columns once (cached with the load)
+        full_df = convert_numeric_columns(pd.concat(dfs, ignore_index=True))
+        
+        # A folder can appear in both video_stats_ALL.csv and an older per-folder file; keep the latest row
+        if '폴더명' in full_df.columns and '처리시간' in full_df.columns:
+            full_df = (
+                full_df.sort_values('처리시간', kind='stable')
+                .drop_duplicates('폴더명', keep='last')
+                .reset_index(drop=True)
+            )
         
         return full_df, loaded_files
         
     except Exception as e:
         return None, f"Error accessing stats_output directory: {str(e)}"
 
+@st.cache_data
+def load_uploaded_files(files_bytes):
+    """Load uploaded CSV files (cached by file contents)"""
+    dfs = []
+    for file_bytes in files_bytes:
+        try:
+            df = pd.read_csv(io.BytesIO(file_bytes), encoding='utf-8-sig')
+        except UnicodeDecodeError:
+            df = pd.read_csv(io.BytesIO(file_bytes), encoding='cp949')
+        dfs.append(df)
+    
+    return convert_numeric_columns(pd.concat(dfs, ignore_index=True))
+
 # Load data
 with st.spinner("Loading CSV files from stats_output directory..."):
     data, message = load_csv_files()
@@ -63,21 +100,6 @@ with st.spinner("Loading CSV files from stats_output directory..."):
 if data is not None:
     st.success(f"✅ Successfully loaded {len(message)} files: {', '.join(message)}")
     
-    # Convert numeric columns
-    numeric_cols = [
-        '총_영상_개수', '총_영상_시간_초', '평균_길이_초', '최소_길이_초', '최대_길이_초', '중간값_초',
-        '30분 미만_개수', '30분 미만_비율',
-        '30-39분_개수', '30-39분_비율',
-        '40-49분_개수', '40-49분_비율',
-        '50-59분_개수', '50-59분_비율',
-        '1시간 이상_개수', '1시간 이상_비율'
-    ]
-    
-    # Only convert columns that exist in the dataframe
-    existing_numeric_cols = [col for col in numeric_cols if col in data.columns]
-    if existing_numeric_cols:
-        data[existing_numeric_cols] = data[existing_numeric_cols].apply(pd.to_numeric, errors='coerce')
-
     st.subheader("📄 Full Data Preview")
     st.dataframe(data)
 
@@ -87,11 +109,22 @@ if data is not None:
     st.subheader("📌 Key Performance Indicators")
 
     if '총_영상_개수' in data.columns:
-        total_videos = int(data['총_영상_개수'].sum())
-        total_length = int(data['총_영상_시간_초'].sum())
-        avg_length = data['평균_길이_초'].mean() if '평균_길이_초' in data.columns else 0
-        max_length = data['최대_길이_초'].max() if '최대_길이_초' in data.columns else 0
-        min_length = data['최소_길이_초'].min() if '최소_길이_초' in data.columns else 0
+        # Compute all KPIs in a single agg call over the columns that exist
+        kpi_aggs = {
+            '총_영상_개수': 'sum',
+            '총_영상_시간_초': 'sum',
+            '평균_길이_초': 'mean',
+            '최대_길이_초': 'max',
+            '최소_길이_초': 'min'
+        }
+        kpi_aggs = {col: func for col, func in kpi_aggs.items() if col in data.columns}
+        kpis = data[list(kpi_aggs)].agg(kpi_aggs)
+
+        total_videos = int(kpis['총_영상_개수'])
+        total_length = int(kpis['총_영상_시간_초'])
+        avg_length = kpis.get('평균_길이_초', 0)
+        max_length = kpis.get('최대_길이_초', 0)
+        min_length = kpis.get('최소_길이_초', 0)
 
         col1, col2, col3, col4, col5 = st.columns(5)
         col1.metric("Total Videos", f"{total_videos:,}")
@@ -123,12 +156,12 @@ if data is not None:
         dist_df.columns = ['Category', 'Count']
         dist_df['Category'] = dist_df['Category'].map({v: k for k, v in available_dist_cols.items()})
 
-        fig, ax = plt.subplots(figsize=(10, 4))
-        sns.barplot(data=dist_df, x='Category', y='Count', ax=ax, palette='Blues_d')
-        ax.set_title("Video Length Distribution")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        st.pyplot(fig)
+        # Rendered client-side by Vega-Lite; sort=None keeps the category order
+        chart = alt.Chart(dist_df, title="Video Length Distribution").mark_bar().encode(
+            x=alt.X('Category', sort=None, axis=alt.Axis(labelAngle=-45)),
+            y='Count'
+        )
+        st.altair_chart(chart, use_container_width=True)
     else:
         st.warning("Distribution columns not found in the data")
 
@@ -179,15 +212,7 @@ else:
     uploaded_files = st.file_uploader("Upload CSV files", type=["csv"], accept_multiple_files=True)
     
     if uploaded_files:
-        dfs = []
-        for file in uploaded_files:
-            try:
-                df = pd.read_csv(file, encoding='utf-8-sig')
-            except UnicodeDecodeError:
-                df = pd.read_csv(file, encoding='cp949')
-            dfs.append(df)
-
-        manual_df = pd.concat(dfs, ignore_index=True)
+        manual_df = load_uploaded_files(tuple(file.getvalue() for file in uploaded_files))
         st.success("✅ Files uploaded successfully!")
         st.dataframe(manual_df)
 